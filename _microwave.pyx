@@ -0,0 +1,76 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional C implementation of MicrowaveVM's inner interpreter.
+
+Same contract as the Numba `_run` in main.py; used by run() when Numba is not
+installed. Build in place with:
+
+    python3 setup.py build_ext --inplace
+"""
+
+from libc.stdint cimport INT64_MAX, INT64_MIN
+
+# Keep in sync with the OP_* ids and register indices in main.py
+cdef enum:
+    OP_SET = 0
+    OP_INC = 1
+    OP_DECJZ = 2
+    OP_GOTO = 3
+    OP_ADDN = 8
+    OP_ZERO = 9
+    POWER = 1
+
+# _NATIVE_TEMP_MAX in main.py
+cdef double TEMP_MAX = 9.2e18
+
+
+def run_program(const long long[:] code, long long[:] regs, long long pc, long long steps,
+                long long temp, double weight_factor, long long max_steps):
+    """
+    Execute SET/INC/DECJZ/GOTO until an instruction that needs Python (PRINT,
+    HALT, PUSH, POP), the end of the program, the step limit (max_steps < 0
+    means unlimited), an INC/DECJZ that would leave the 64-bit range or a
+    TEMP too large for int64.
+    Returns the updated (pc, steps, temp); regs is updated in place.
+    """
+    cdef Py_ssize_t n = code.shape[0] // 2
+    cdef long long word, imm, op, r, v, nz, change
+    cdef double dt
+    with nogil:
+        while 0 <= pc < n:
+            if max_steps >= 0 and steps >= max_steps:
+                break
+            # Packed record: op_id | r << 8 | r2 << 16, then the immediate/jump target
+            word = code[2 * pc]
+            op = word & 0xFF
+            if op > OP_GOTO and op != OP_ADDN and op != OP_ZERO:
+                break
+            r = (word >> 8) & 0xFF
+            # Overflow is left to step(), which raises the VM error
+            if op == OP_INC and regs[r] == INT64_MAX:
+                break
+            if op != OP_SET and op != OP_INC and op != OP_GOTO and regs[r] == INT64_MIN:
+                break
+            # Thermal model, as in MicrowaveVM._update_thermal_model (the cast truncates like int())
+            dt = (regs[POWER] * 0.1 - temp * 0.02) / weight_factor
+            if temp + dt >= TEMP_MAX:
+                break
+            change = <long long>dt
+            temp = temp + change if temp + change > 0 else 0
+            imm = code[2 * pc + 1]
+            if op == OP_SET:
+                regs[r] = imm
+                pc += 1
+            elif op == OP_INC:
+                regs[r] += 1
+                pc += 1
+            elif op == OP_GOTO:
+                pc = imm
+            else:
+                # DECJZ; fused loops keep their INC/GOTO slots, so they run as plain DECJZ here
+                v = regs[r]
+                nz = v != 0
+                regs[r] = v - nz
+                pc = imm ^ (((pc + 1) ^ imm) * nz)
+            steps += 1
+    return pc, steps, temp
@@ -1,12 +1,301 @@
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, replace
+from functools import lru_cache
+import struct
+import sys
 from typing import List, Dict, Tuple, Optional
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it run_batch() returns a list of tuples
+    np = None
+
+try:
+    from numba import cuda, njit
+except ImportError:  # Numba is optional; without it run() uses _microwave or pure Python
+    cuda = None
+    njit = None
+
 Register = str
 
-@dataclass
+# Opcode ids used by the compiled code table (see MicrowaveVM._compile)
+OP_SET, OP_INC, OP_DECJZ, OP_GOTO, OP_PRINT, OP_HALT, OP_PUSH, OP_POP = range(8)
+# Superinstructions produced by MicrowaveVM._fuse (never written in source)
+OP_ADDN, OP_ZERO = 8, 9
+OPCODES: Dict[str, int] = {
+    "SET": OP_SET, "INC": OP_INC, "DECJZ": OP_DECJZ, "GOTO": OP_GOTO,
+    "PRINT": OP_PRINT, "HALT": OP_HALT, "PUSH": OP_PUSH, "POP": OP_POP,
+}
+# Writable register indices into MicrowaveVM.regs
+TIME, POWER = 0, 1
+REGISTER_INDEX: Dict[Register, int] = {"TIME": TIME, "POWER": POWER}
+REGISTER_NAMES: Tuple[Register, ...] = ("TIME", "POWER")
+# Registers are signed 64-bit (MicrowaveVM.regs is an array('q'))
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+# TEMP is unbounded in Python; the native kernels hand over to step() a little below 2**63
+_NATIVE_TEMP_MAX = 9.2e18
+_COMMA_TO_SPACE = str.maketrans(',', ' ')
+# One packed instruction (see MicrowaveVM._compile): op/register word, immediate word
+_RECORD = struct.Struct('qq')
+# PRINTed values buffered in 'batch' output mode before they are written out
+_OUTPUT_BUFFER_SIZE = 1024
+
+def _register_overflow(r: int) -> RuntimeError:
+    return RuntimeError(f"Register overflow: {REGISTER_NAMES[r]} is outside the 64-bit range")
+
+
+@dataclass(slots=True, frozen=True)
 class Instr:
-    op: str
-    args: Tuple[str, ...]  # tokens as strings
+    op_id: int  # OP_* opcode id
+    r: int = 0  # register index (SET/INC/DECJZ/PUSH/POP)
+    imm: int = 0  # SET value or resolved jump target PC (DECJZ/GOTO)
+    r2: int = 0  # destination register (ADDN)
+
+
+# --- Operand validation (one entry per opcode, used by _decode) ---
+def _is_int(text: str) -> bool:
+    digits = text[1:] if text[:1] in ('+', '-') else text
+    if digits.isdecimal():
+        return True
+    # Rare spellings such as '1_000' or surrounding whitespace; int() decides
+    try:
+        int(text)
+    except ValueError:
+        return False
+    return True
+
+def _check_set(line: str, args: Tuple[str, ...], reg: Optional[int]):
+    if len(args) != 2:
+        raise ValueError(f"SET expects 2 args: {line}")
+    if reg is None:
+        raise ValueError(f"Unknown register in SET: {args[0]}")
+    if not _is_int(args[1]):
+        raise ValueError(f"SET value must be integer: {args[1]}")
+    if not INT64_MIN <= int(args[1]) <= INT64_MAX:
+        raise ValueError(f"SET value out of range: {args[1]}")
+
+def _check_decjz(line: str, args: Tuple[str, ...], reg: Optional[int]):
+    if len(args) != 2 or reg is None:
+        raise ValueError(f"DECJZ expects register and label: {line}")
+
+def _check_goto(line: str, args: Tuple[str, ...], reg: Optional[int]):
+    if len(args) != 1:
+        raise ValueError(f"GOTO expects 1 label: {line}")
+
+def _register_operand(op: str):
+    def check(line: str, args: Tuple[str, ...], reg: Optional[int]):
+        if len(args) != 1 or reg is None:
+            raise ValueError(f"{op} expects register (TIME/POWER): {line}")
+    return check
+
+def _no_operands(op: str):
+    def check(line: str, args: Tuple[str, ...], reg: Optional[int]):
+        if len(args) != 0:
+            raise ValueError(f"{op} takes no args: {line}")
+    return check
+
+_VALIDATORS = {
+    "SET": _check_set, "INC": _register_operand("INC"), "DECJZ": _check_decjz,
+    "GOTO": _check_goto, "PRINT": _no_operands("PRINT"), "PUSH": _register_operand("PUSH"),
+    "POP": _register_operand("POP"), "HALT": _no_operands("HALT"),
+}
+
+
+@lru_cache(maxsize=32)
+def _decode(source: str) -> Tuple[Tuple[Instr, ...], Dict[str, int]]:
+    """
+    Assemble source into (instructions, labels). Results are cached by source
+    text, so reloading the same program skips parsing; the returned Instr
+    objects are shared between VMs, which is why Instr is frozen.
+    """
+    program: List[Instr] = []
+    labels: Dict[str, int] = {}
+    # Single pass: labels point at the next instruction index; branch
+    # targets are patched once every label is known
+    patches: List[Tuple[int, str]] = []
+    for raw in source.splitlines():
+        # Cut at the first ';' or '#' (a missing one maps find()'s -1 to len(raw))
+        end = len(raw) + 1
+        line = raw[:min(raw.find(';') % end, raw.find('#') % end)].strip()
+        if not line:
+            continue
+        if line.endswith(':'):
+            label = line[:-1].strip()
+            if not label:
+                raise ValueError("Empty label definition.")
+            if label in labels:
+                raise ValueError(f"Duplicate label: {label}")
+            labels[label] = len(program)
+            continue
+        tokens = line.translate(_COMMA_TO_SPACE).split()
+        op = tokens[0].upper()
+        args = tuple(tokens[1:])
+        # Register operand, case-normalised once (None if absent or not TIME/POWER)
+        reg = REGISTER_INDEX.get(args[0].upper()) if args else None
+        check = _VALIDATORS.get(op)
+        if check is None:
+            raise ValueError(f"Unknown opcode: {op}")
+        check(line, args, reg)
+
+        op_id = OPCODES[op]
+        r = reg if op_id in (OP_SET, OP_INC, OP_DECJZ, OP_PUSH, OP_POP) else 0
+        imm = 0
+        if op_id == OP_SET:
+            imm = int(args[1])
+        elif op_id in (OP_DECJZ, OP_GOTO):
+            # Placeholder target until the label table is complete
+            imm = -1
+            patches.append((len(program), args[-1]))
+        program.append(Instr(op_id, r, imm))
+
+    # Back-patch branch targets; only the branch instructions are revisited
+    for idx, target in patches:
+        if target not in labels:
+            raise ValueError(f"Unknown label: {target}")
+        program[idx] = replace(program[idx], imm=labels[target])
+
+    _fuse(program)
+    return tuple(program), labels
+
+
+def _fuse(program: List[Instr]):
+    """
+    Peephole pass replacing the head of counted loops with a superinstruction:
+
+        loop: DECJZ A end / INC B / GOTO loop   ->  ADDN A B end  (B += A; A := 0)
+        loop: DECJZ A end / GOTO loop           ->  ZERO A end    (A := 0)
+
+    Only the DECJZ slot is rewritten; the INC/GOTO that follow are kept so
+    jumps into the loop body and the unfused fallback still behave the same.
+    """
+    for pc, instr in enumerate(program):
+        if instr.op_id != OP_DECJZ:
+            continue
+        body = program[pc + 1:pc + 3]
+        if len(body) >= 1 and body[0].op_id == OP_GOTO and body[0].imm == pc:
+            program[pc] = Instr(OP_ZERO, instr.r, instr.imm)
+        elif (len(body) == 2 and body[0].op_id == OP_INC and body[0].r != instr.r
+                and body[1].op_id == OP_GOTO and body[1].imm == pc):
+            program[pc] = Instr(OP_ADDN, instr.r, instr.imm, body[0].r)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _thermal_step(temp, power, weight_factor):
+        # Same model as MicrowaveVM._update_thermal_model, with the weight factor hoisted
+        return max(0, temp + int((power * 0.1 - temp * 0.02) / weight_factor))
+
+    @njit(cache=True)
+    def _run(code, regs, pc, steps, temp, weight_factor, max_steps):
+        """
+        Native inner interpreter over the packed program (see MicrowaveVM._compile).
+
+        Executes SET/INC/DECJZ/GOTO until it reaches an instruction that needs
+        Python (PRINT, HALT, PUSH, POP), the end of the program, the step limit
+        (max_steps < 0 means unlimited), an INC/DECJZ that would leave the
+        64-bit range (step() then reports it) or a TEMP too large for int64.
+        Returns the updated (pc, steps, temp); regs is updated in place.
+        """
+        n = code.shape[0] // 2
+        while 0 <= pc < n:
+            if max_steps >= 0 and steps >= max_steps:
+                break
+            if temp + (regs[POWER] * 0.1 - temp * 0.02) / weight_factor >= _NATIVE_TEMP_MAX:
+                break
+            word = code[2 * pc]
+            op = word & 0xFF
+            r = (word >> 8) & 0xFF
+            imm = code[2 * pc + 1]
+            if op == OP_SET:
+                temp = _thermal_step(temp, regs[POWER], weight_factor)
+                regs[r] = imm
+                pc += 1
+            elif op == OP_INC:
+                if regs[r] == INT64_MAX:
+                    break
+                temp = _thermal_step(temp, regs[POWER], weight_factor)
+                regs[r] += 1
+                pc += 1
+            elif op == OP_DECJZ or op == OP_ADDN or op == OP_ZERO:
+                # Fused loops keep their INC/GOTO slots, so they run as plain DECJZ here.
+                # Branchless: nz is 1 to decrement and fall through, 0 to jump to imm
+                if regs[r] == INT64_MIN:
+                    break
+                temp = _thermal_step(temp, regs[POWER], weight_factor)
+                v = regs[r]
+                nz = np.int64(v != 0)
+                regs[r] = v - nz
+                pc = imm ^ (((pc + 1) ^ imm) * nz)
+            elif op == OP_GOTO:
+                temp = _thermal_step(temp, regs[POWER], weight_factor)
+                pc = imm
+            else:
+                break
+            steps += 1
+        return pc, steps, temp
+else:
+    try:  # Cython build of the same interpreter (see _microwave.pyx / setup.py)
+        from _microwave import run_program as _run
+    except ImportError:
+        _run = None
+
+if cuda is not None:
+    @cuda.jit
+    def _run_batch_kernel(code, states, max_steps, steps_out):
+        """
+        One thread per VM: runs the program from pc 0 on states[i] = (TIME, POWER)
+        and writes the final registers back in place. Only used for programs without
+        PRINT/PUSH/POP; HALT just stops the thread. steps_out[i] is -1 if the lane
+        hit the step limit (max_steps < 0 means unlimited) and -2 - r if register r
+        would have left the 64-bit range.
+        """
+        i = cuda.grid(1)
+        if i >= states.shape[0]:
+            return
+        regs = cuda.local.array(2, np.int64)
+        regs[TIME] = states[i, TIME]
+        regs[POWER] = states[i, POWER]
+        n = code.shape[0] // 2
+        pc = 0
+        steps = 0
+        while 0 <= pc < n:
+            if max_steps >= 0 and steps >= max_steps:
+                steps = -1
+                break
+            word = code[2 * pc]
+            op = word & 0xFF
+            if op == OP_HALT:
+                break
+            r = (word >> 8) & 0xFF
+            if op == OP_SET:
+                regs[r] = code[2 * pc + 1]
+                pc += 1
+            elif op == OP_INC:
+                if regs[r] == INT64_MAX:
+                    steps = -2 - r
+                    break
+                regs[r] += 1
+                pc += 1
+            elif op == OP_GOTO:
+                pc = code[2 * pc + 1]
+            else:
+                # DECJZ, and the fused loops that keep their INC/GOTO slots
+                if regs[r] == 0:
+                    pc = code[2 * pc + 1]
+                elif regs[r] == INT64_MIN:
+                    steps = -2 - r
+                    break
+                else:
+                    regs[r] -= 1
+                    pc += 1
+            steps += 1
+        # run() also checks the limit before the step that falls off the end
+        if steps >= 0 and not (0 <= pc < n) and max_steps >= 0 and steps >= max_steps:
+            steps = -1
+        states[i, TIME] = regs[TIME]
+        states[i, POWER] = regs[POWER]
+        steps_out[i] = steps
+
 
 class MicrowaveVM:
     """
@@ -29,7 +318,7 @@ class MicrowaveVM:
     """
 
     def __init__(self):
-        self.registers: Dict[Register, int] = {"TIME": 0, "POWER": 0}
+        self.regs = array('q', (0, 0))  # indexed by TIME / POWER
         self.readonly_registers: Dict[Register, int] = {"TEMP": 0, "WEIGHT": 100}  # WEIGHT in grams
         self.program: List[Instr] = []
         self.labels: Dict[str, int] = {}
@@ -38,10 +327,25 @@ class MicrowaveVM:
         self.steps: int = 0
         self.stack: List[int] = []
         self.ticks: int = 0  # Total execution ticks for thermal modeling
+        # Packed program, two int64 words per instruction (see _compile)
+        self.code = b""
+        self._mv = memoryview(self.code).cast('q')
+        self._compiled = None  # (function, entry PCs) from compile_to_python
+        # Opcode handlers, indexed by op id
+        self._handlers = [
+            self._op_set, self._op_inc, self._op_decjz, self._op_goto,
+            self._op_print, self._op_halt, self._op_push, self._op_pop,
+            self._op_addn, self._op_zero,
+        ]
+        self._step_limit: Optional[int] = None  # max_steps of the current run()
+        self._out: List[int] = []  # TIME values PRINTed but not yet written
+        self._running = False  # inside run(); step() on its own writes output immediately
+        self.set_output_mode('batch')
 
     # --- Assembler / Loader ---
     def load_program(self, source: str):
         self.program.clear()
+        self._compiled = None
         self.labels.clear()
         self.stack.clear()
         self.readonly_registers["TEMP"] = 0  # Reset temperature
@@ -51,134 +355,125 @@ class MicrowaveVM:
         self.steps = 0
         self.ticks = 0
 
-        lines = source.splitlines()
-        # First pass: collect labels
-        idx = 0
-        for raw in lines:
-            line = raw.split(';', 1)[0].split('#', 1)[0].strip()
-            if not line:
-                continue
-            if line.endswith(':'):
-                label = line[:-1].strip()
-                if not label:
-                    raise ValueError("Empty label definition.")
-                if label in self.labels:
-                    raise ValueError(f"Duplicate label: {label}")
-                self.labels[label] = idx
-            else:
-                idx += 1
-
-        # Second pass: parse instructions
-        for raw in lines:
-            line = raw.split(';', 1)[0].split('#', 1)[0].strip()
-            if not line or line.endswith(':'):
-                continue
-            tokens = line.replace(',', ' ').split()
-            op = tokens[0].upper()
-            args = tuple(tokens[1:])
-            # Basic validation
-            if op == "SET":
-                if len(args) != 2:
-                    raise ValueError(f"SET expects 2 args: {line}")
-                if args[0].upper() not in ("TIME", "POWER"):
-                    raise ValueError(f"Unknown register in SET: {args[0]}")
-                try:
-                    int(args[1])
-                except:
-                    raise ValueError(f"SET value must be integer: {args[1]}")
-            elif op == "INC":
-                if len(args) != 1 or args[0].upper() not in ("TIME", "POWER"):
-                    raise ValueError(f"INC expects register (TIME/POWER): {line}")
-            elif op == "DECJZ":
-                if len(args) != 2 or args[0].upper() not in ("TIME", "POWER"):
-                    raise ValueError(f"DECJZ expects register and label: {line}")
-                # label existence checked at run-time to allow forward refs
-            elif op == "GOTO":
-                if len(args) != 1:
-                    raise ValueError(f"GOTO expects 1 label: {line}")
-            elif op == "PRINT":
-                if len(args) != 0:
-                    raise ValueError(f"PRINT takes no args: {line}")
-            elif op == "PUSH":
-                if len(args) != 1 or args[0].upper() not in ("TIME", "POWER"):
-                    raise ValueError(f"PUSH expects register (TIME/POWER): {line}")
-            elif op == "POP":
-                if len(args) != 1 or args[0].upper() not in ("TIME", "POWER"):
-                    raise ValueError(f"POP expects register (TIME/POWER): {line}")
-            elif op == "HALT":
-                if len(args) != 0:
-                    raise ValueError(f"HALT takes no args: {line}")
-            else:
-                raise ValueError(f"Unknown opcode: {op}")
-            self.program.append(Instr(op, args))
+        program, labels = _decode(source)
+        self.program[:] = program
+        self.labels.update(labels)
+        self._compile()
+
+    def _compile(self):
+        """
+        Pack the decoded program into one contiguous buffer of 16-byte records,
+        four per cache line. Record pc is the int64 pair at words 2*pc, 2*pc+1:
+        op_id | r << 8 | r2 << 16, then the immediate/jump target. step() and the
+        native interpreters read this instead of the Instr list.
+        """
+        buf = bytearray(_RECORD.size * len(self.program))
+        for pc, instr in enumerate(self.program):
+            _RECORD.pack_into(buf, _RECORD.size * pc,
+                              instr.op_id | instr.r << 8 | instr.r2 << 16, instr.imm)
+        self.code = bytes(buf)
+        self._mv = memoryview(self.code).cast('q')
 
     # --- Execution ---
     def step(self):
         if self.halted:
             return
-        if not (0 <= self.pc < len(self.program)):
+        pc = self.pc
+        mv = self._mv
+        if not (0 <= 2 * pc < len(mv)):
             # Implicit halt if PC falls off program
             self.halted = True
             return
 
-        instr = self.program[self.pc]
         self.steps += 1
         self.ticks += 1
         
         # Update thermal model after each instruction
         self._update_thermal_model()
 
-        def regname(s: str) -> str:
-            return s.upper()
-
-        if instr.op == "SET":
-            r, v = regname(instr.args[0]), int(instr.args[1])
-            self.registers[r] = v
-            self.pc += 1
-
-        elif instr.op == "INC":
-            r = regname(instr.args[0])
-            self.registers[r] = self.registers.get(r, 0) + 1
-            self.pc += 1
-
-        elif instr.op == "DECJZ":
-            r = regname(instr.args[0])
-            target = instr.args[1]
-            if self.registers.get(r, 0) == 0:
-                if target not in self.labels:
-                    raise ValueError(f"Unknown label: {target}")
-                self.pc = self.labels[target]
-            else:
-                self.registers[r] -= 1
-                self.pc += 1
-
-        elif instr.op == "GOTO":
-            target = instr.args[0]
-            if target not in self.labels:
-                raise ValueError(f"Unknown label: {target}")
-            self.pc = self.labels[target]
-
-        elif instr.op == "PRINT":
-            print(f"TIME: {self.registers.get('TIME', 0)}")
-            self.pc += 1
-
-        elif instr.op == "PUSH":
-            r = regname(instr.args[0])
-            value = self.registers.get(r, 0)
-            self.stack.append(value)
+        word = mv[2 * pc]
+        self._handlers[word & 0xFF]((word >> 8) & 0xFF, mv[2 * pc + 1])
+
+    def _op_set(self, r: int, imm: int):
+        self.regs[r] = imm
+        self.pc += 1
+
+    def _op_inc(self, r: int, imm: int):
+        if self.regs[r] == INT64_MAX:
+            raise _register_overflow(r)
+        self.regs[r] += 1
+        self.pc += 1
+
+    def _op_decjz(self, r: int, imm: int):
+        if self.regs[r] == 0:
+            self.pc = imm
+        elif self.regs[r] == INT64_MIN:
+            raise _register_overflow(r)
+        else:
+            self.regs[r] -= 1
             self.pc += 1
 
-        elif instr.op == "POP":
-            r = regname(instr.args[0])
-            if not self.stack:
-                raise RuntimeError("Cannot POP from empty stack")
-            value = self.stack.pop()
-            self.registers[r] = value
-            self.pc += 1
-
-        elif instr.op == "HALT":
-            print("BEEEEEEP!")
-            self.halted = True
+    def _op_addn(self, r: int, imm: int):
+        regs, src, dst = self.regs, r, (self._mv[2 * self.pc] >> 16) & 0xFF
+        count = regs[src]
+        # The whole loop is 3 steps per unit; fall back to DECJZ if it would cross the step
+        # limit or overflow dst, so the unfused loop stops at the same point
+        if (count <= 0 or regs[dst] > INT64_MAX - count
+                or (self._step_limit is not None and self.steps + 3 * count > self._step_limit)):
+            return self._op_decjz(r, imm)
+        # Replay the thermal model for the INC, GOTO and DECJZ of every iteration
+        temp = self.readonly_registers['TEMP']
+        weight_factor = max(1.0, (self.readonly_registers['WEIGHT'] / 100.0) ** 0.5)
+        for _ in range(count):
+            regs[src] -= 1
+            temp = max(0, temp + int((regs[POWER] * 0.1 - temp * 0.02) / weight_factor))
+            regs[dst] += 1
+            temp = max(0, temp + int((regs[POWER] * 0.1 - temp * 0.02) / weight_factor))
+            temp = max(0, temp + int((regs[POWER] * 0.1 - temp * 0.02) / weight_factor))
+        self.readonly_registers['TEMP'] = temp
+        self.steps += 3 * count
+        self.ticks += 3 * count
+        self.pc = imm
+
+    def _op_zero(self, r: int, imm: int):
+        regs = self.regs
+        count = regs[r]
+        if count <= 0 or (self._step_limit is not None and self.steps + 2 * count > self._step_limit):
+            return self._op_decjz(r, imm)
+        # Replay the thermal model for the GOTO and DECJZ of every iteration
+        temp = self.readonly_registers['TEMP']
+        weight_factor = max(1.0, (self.readonly_registers['WEIGHT'] / 100.0) ** 0.5)
+        for _ in range(count):
+            regs[r] -= 1
+            temp = max(0, temp + int((regs[POWER] * 0.1 - temp * 0.02) / weight_factor))
+            temp = max(0, temp + int((regs[POWER] * 0.1 - temp * 0.02) / weight_factor))
+        self.readonly_registers['TEMP'] = temp
+        self.steps += 2 * count
+        self.ticks += 2 * count
+        self.pc = imm
+
+    def _op_goto(self, r: int, imm: int):
+        self.pc = imm
+
+    def _op_print(self, r: int, imm: int):
+        self._emit(self.regs[TIME])
+        self.pc += 1
+
+    def _op_halt(self, r: int, imm: int):
+        self.flush()
+        print("BEEEEEEP!")
+        self.halted = True
+
+    def _op_push(self, r: int, imm: int):
+        self.stack.append(self.regs[r])
+        self.pc += 1
+
+    def _op_pop(self, r: int, imm: int):
+        if not self.stack:
+            raise RuntimeError("Cannot POP from empty stack")
+        value = self.stack.pop()
+        self.regs[r] = value
+        self.pc += 1
 
     def _update_thermal_model(self):
         """
@@ -187,7 +482,7 @@ class MicrowaveVM:
         - Heat transfer is affected by item weight (larger items heat slower)
         - Simplified equation: dT = (POWER * 0.1 - TEMP * 0.02) / sqrt(WEIGHT/100)
         """
-        power = self.registers.get('POWER', 0)
+        power = self.regs[POWER]
         current_temp = self.readonly_registers['TEMP']
         weight = self.readonly_registers['WEIGHT']
         
@@ -205,18 +500,275 @@ class MicrowaveVM:
         self.readonly_registers['TEMP'] = new_temp
 
     def run(self, max_steps: Optional[int] = None):
+        self._step_limit = max_steps
+        self._running = True
+        try:
+            # The native interpreters beat the generated code, so it only replaces the Python loop
+            if _run is not None:
+                self._run_compiled(max_steps)
+            elif self._compiled is not None:
+                self._run_generated(max_steps)
+            else:
+                self._run_interpreted(max_steps)
+        finally:
+            self._running = False
+            self.flush()
+
+    def _run_interpreted(self, max_steps: Optional[int]):
+        # SET/INC/DECJZ/GOTO run inline on local copies of the VM state; the
+        # rest (and the step limit) is flushed back to self and goes through step()
+        mv, regs = self._mv, self.regs
+        n = len(mv) // 2
+        readonly = self.readonly_registers
+        weight_factor = max(1.0, (readonly['WEIGHT'] / 100.0) ** 0.5)
+        limit = float('inf') if max_steps is None else max_steps
+        while not self.halted:
+            pc, steps, temp = self.pc, self.steps, readonly['TEMP']
+            try:
+                while 0 <= pc < n and steps < limit:
+                    word = mv[2 * pc]
+                    op = word & 0xFF
+                    if op > OP_GOTO:  # OP_SET..OP_GOTO are the inline ops
+                        break
+                    # r2 is only set on ADDN, so word >> 8 is the register operand below
+                    steps += 1
+                    temp = max(0, temp + int((regs[POWER] * 0.1 - temp * 0.02) / weight_factor))
+                    if op == OP_DECJZ:
+                        r = word >> 8
+                        if regs[r] == 0:
+                            pc = mv[2 * pc + 1]
+                        elif regs[r] == INT64_MIN:
+                            raise _register_overflow(r)
+                        else:
+                            regs[r] -= 1
+                            pc += 1
+                    elif op == OP_INC:
+                        r = word >> 8
+                        if regs[r] == INT64_MAX:
+                            raise _register_overflow(r)
+                        regs[r] += 1
+                        pc += 1
+                    elif op == OP_GOTO:
+                        pc = mv[2 * pc + 1]
+                    else:
+                        regs[word >> 8] = mv[2 * pc + 1]
+                        pc += 1
+            finally:
+                self.ticks += steps - self.steps
+                self.pc, self.steps = pc, steps
+                readonly['TEMP'] = temp
+            if max_steps is not None and self.steps >= max_steps:
+                raise RuntimeError("Step limit reached (possible infinite loop).")
+            self.step()
+
+    def _run_compiled(self, max_steps: Optional[int]):
+        if njit is not None:
+            # Zero-copy views; regs shares memory with self.regs
+            code = np.frombuffer(self.code, dtype=np.int64)
+            regs = np.frombuffer(self.regs, dtype=np.int64)
+        else:
+            # The Cython build takes the buffers directly as typed memoryviews
+            code, regs = self._mv, self.regs
+        weight_factor = max(1.0, (self.readonly_registers['WEIGHT'] / 100.0) ** 0.5)
+        # -1 means unlimited to the kernel; a negative max_steps is already exhausted
+        limit = -1 if max_steps is None else max(max_steps, 0)
         while not self.halted:
+            # Past int64, TEMP stays a Python int and only step() can run
+            if self.readonly_registers['TEMP'] <= INT64_MAX:
+                pc, steps, temp = _run(code, regs, self.pc, self.steps,
+                                       self.readonly_registers['TEMP'], weight_factor, limit)
+                self.ticks += steps - self.steps
+                self.pc, self.steps = pc, steps
+                self.readonly_registers['TEMP'] = temp
             if max_steps is not None and self.steps >= max_steps:
                 raise RuntimeError("Step limit reached (possible infinite loop).")
+            # PRINT/HALT/PUSH/POP and falling off the program go through step()
             self.step()
 
+    def _run_generated(self, max_steps: Optional[int]):
+        fn, entries = self._compiled
+        # The generated code can only be entered at a block leader
+        while not self.halted and self.pc not in entries:
+            if max_steps is not None and self.steps >= max_steps:
+                raise RuntimeError("Step limit reached (possible infinite loop).")
+            self.step()
+        if not self.halted:
+            fn(self, float('inf') if max_steps is None else max_steps)
+
+    # --- Batch execution ---
+    def run_batch(self, initial_states, max_steps: Optional[int] = None):
+        """
+        Run the loaded program once per (TIME, POWER) pair in initial_states and
+        return the final (TIME, POWER) of each run, as an (N, 2) int64 array when
+        NumPy is available and a list of tuples otherwise.
+
+        Programs without PRINT/PUSH/POP run on the GPU (one thread per VM) when
+        Numba's CUDA target is available; there HALT is silent and TEMP is not
+        simulated, since neither affects the result. Everything else falls back
+        to running the VM on the CPU for each pair, leaving it in the state of
+        the last run.
+        """
+        if (cuda is not None and len(initial_states) > 0 and cuda.is_available()
+                and not any(instr.op_id in (OP_PRINT, OP_PUSH, OP_POP) for instr in self.program)):
+            try:
+                states = np.array(initial_states, dtype=np.int64).reshape(-1, 2)
+            except OverflowError:
+                raise ValueError("Register value out of range in initial_states") from None
+            steps = np.zeros(len(states), dtype=np.int64)
+            d_states = cuda.to_device(states)
+            d_steps = cuda.to_device(steps)
+            code = cuda.to_device(np.frombuffer(self.code, dtype=np.int64))
+            threads = 256
+            blocks = (len(states) + threads - 1) // threads
+            limit = -1 if max_steps is None else max(max_steps, 0)
+            _run_batch_kernel[blocks, threads](code, d_states, limit, d_steps)
+            states = d_states.copy_to_host()
+            steps = d_steps.copy_to_host()
+            failed = np.flatnonzero(steps < 0)
+            if len(failed):
+                # Report the first failing lane, as the CPU loop below would
+                status = steps[failed[0]]
+                if status == -1:
+                    raise RuntimeError("Step limit reached (possible infinite loop).")
+                raise _register_overflow(int(-2 - status))
+            return states
+
+        weight = self.readonly_registers['WEIGHT']
+        results = []
+        for t, p in initial_states:
+            self.reset_registers(TIME=t, POWER=p, WEIGHT=weight)
+            self.run(max_steps)
+            results.append((self.regs[TIME], self.regs[POWER]))
+        if np is not None:
+            return np.array(results, dtype=np.int64).reshape(-1, 2)
+        return results
+
+    # --- Python code generation ---
+    def compile_to_python(self, source: str):
+        """
+        Load a program and translate it into a Python function that run() executes
+        instead of the pure-Python interpreter (Numba or the Cython build still take
+        precedence when available). Each basic block becomes straight-line code
+        over the locals t (TIME) and p (POWER); only jumps go back through a
+        dispatch on pc. Returns the generated function, called as fn(vm, limit).
+        """
+        self.load_program(source)
+        program = self.program
+        entries = {0} | {instr.imm for instr in program
+                         if instr.op_id in (OP_DECJZ, OP_GOTO, OP_ADDN, OP_ZERO)}
+        reg = ("t", "p")
+        src = [
+            "def _program(vm, limit):",
+            "    t, p = vm.regs",
+            "    temp = vm.readonly_registers['TEMP']",
+            "    wf = max(1.0, (vm.readonly_registers['WEIGHT'] / 100.0) ** 0.5)",
+            "    stack = vm.stack",
+            "    emit = vm._emit",
+            "    pc, steps = vm.pc, vm.steps",
+            "    try:",
+            "        while True:",
+            f"            if not (0 <= pc < {len(program)}):",
+            # run() checks the step limit before every step, including the implicit halt
+            "                if steps >= limit:",
+            "                    raise RuntimeError('Step limit reached (possible infinite loop).')",
+            "                vm.halted = True",
+            "                return",
+        ]
+        ind = " " * 16
+        in_block = False
+        for pc, instr in enumerate(program):
+            if pc in entries:
+                if in_block:
+                    src.append(f"{ind}pc = {pc}")
+                src.append(f"            elif pc == {pc}:")
+                in_block = True
+            elif not in_block:
+                continue  # unreachable: follows a GOTO/HALT and is not a jump target
+            op, r = instr.op_id, reg[instr.r]
+            overflow = [f"{ind}    pc = {pc}",
+                        f"{ind}    raise RuntimeError('{_register_overflow(instr.r)}')"]
+            src += [
+                f"{ind}if steps >= limit:",
+                f"{ind}    pc = {pc}",
+                f"{ind}    raise RuntimeError('Step limit reached (possible infinite loop).')",
+                f"{ind}steps += 1",
+                f"{ind}temp = max(0, temp + int((p * 0.1 - temp * 0.02) / wf))",
+            ]
+            if op == OP_SET:
+                src.append(f"{ind}{r} = {instr.imm}")
+            elif op == OP_INC:
+                src += [f"{ind}if {r} == {INT64_MAX}:", *overflow, f"{ind}{r} += 1"]
+            elif op in (OP_DECJZ, OP_ADDN, OP_ZERO):
+                # Fused loops still have their INC/GOTO body, so emit the plain DECJZ
+                src += [f"{ind}if {r} == 0:", f"{ind}    pc = {instr.imm}", f"{ind}    continue",
+                        f"{ind}if {r} == {INT64_MIN}:", *overflow, f"{ind}{r} -= 1"]
+            elif op == OP_GOTO:
+                src += [f"{ind}pc = {instr.imm}", f"{ind}continue"]
+                in_block = False
+            elif op == OP_PRINT:
+                src.append(f"{ind}emit(t)")
+            elif op == OP_PUSH:
+                src.append(f"{ind}stack.append({r})")
+            elif op == OP_POP:
+                src += [f"{ind}if not stack:", f"{ind}    pc = {pc}",
+                        f"{ind}    raise RuntimeError('Cannot POP from empty stack')",
+                        f"{ind}{r} = stack.pop()"]
+            elif op == OP_HALT:
+                src += [f"{ind}vm.flush()", f"{ind}print('BEEEEEEP!')", f"{ind}vm.halted = True",
+                        f"{ind}pc = {pc}", f"{ind}return"]
+                in_block = False
+        if in_block:
+            src.append(f"{ind}pc = {len(program)}")
+        src += [
+            "    finally:",
+            "        vm.regs[TIME], vm.regs[POWER] = t, p",
+            "        vm.readonly_registers['TEMP'] = temp",
+            "        vm.ticks += steps - vm.steps",
+            "        vm.pc, vm.steps = pc, steps",
+        ]
+        namespace = {"TIME": TIME, "POWER": POWER}
+        exec(compile("\n".join(src), "<microwave>", "exec"), namespace)
+        self._compiled = (namespace["_program"], frozenset(entries))
+        return namespace["_program"]
+
+    # --- Output ---
+    def set_output_mode(self, mode: str):
+        """
+        'batch' (default) collects PRINT output during run() and writes it in one
+        go at HALT, when run() returns, every _OUTPUT_BUFFER_SIZE values or on
+        flush(); 'stream' prints every PRINT immediately. PRINTs executed by
+        calling step() directly are written immediately in either mode.
+        """
+        if mode == 'batch':
+            self._emit = self._buffer_time
+        elif mode == 'stream':
+            self.flush()
+            self._emit = self._print_time
+        else:
+            raise ValueError(f"Unknown output mode: {mode}")
+
+    def flush(self):
+        """Write any buffered PRINT output to stdout."""
+        if self._out:
+            sys.stdout.write(''.join(f"TIME: {v}\n" for v in self._out))
+            self._out.clear()
+
+    def _buffer_time(self, value: int):
+        out = self._out
+        out.append(value)
+        if len(out) >= _OUTPUT_BUFFER_SIZE or not self._running:
+            self.flush()
+
+    def _print_time(self, value: int):
+        print(f"TIME: {value}")
+
     # --- Helpers ---
     def state(self) -> Dict[str, int]:
-        return dict(self.registers)
+        return {name: self.regs[i] for i, name in enumerate(REGISTER_NAMES)}
 
     def full_state(self) -> Dict:
         return {
-            "registers": dict(self.registers),
+            "registers": self.state(),
             "readonly_registers": dict(self.readonly_registers),
             "stack": list(self.stack),
             "pc": self.pc,
@@ -233,8 +785,11 @@ class MicrowaveVM:
         return list(self.stack)
 
     def reset_registers(self, TIME: int = 0, POWER: int = 0, WEIGHT: int = 100):
-        self.registers["TIME"] = int(TIME)
-        self.registers["POWER"] = int(POWER)
+        # TIME/POWER here are the arguments, not the register indices
+        for value in (TIME, POWER):
+            if not INT64_MIN <= int(value) <= INT64_MAX:
+                raise ValueError(f"Register value out of range: {value}")
+        self.regs[:] = array('q', (int(TIME), int(POWER)))
         self.readonly_registers["TEMP"] = 0  # Reset to room temperature
         self.readonly_registers["WEIGHT"] = max(1, int(WEIGHT))  # Set item weight
         self.stack.clear()
@@ -358,8 +913,6 @@ done:
 
 # Quick usage example
 if __name__ == "__main__":
-    import sys
-    
     vm = MicrowaveVM()
 
     if len(sys.argv) > 1:
@@ -0,0 +1,12 @@
+# Builds the optional C interpreter used by MicrowaveVM.run() when Numba is not installed:
+#   python3 setup.py build_ext --inplace
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:  # Cython is optional; without it run() uses Numba or pure Python
+    ext_modules = []
+else:
+    ext_modules = cythonize("_microwave.pyx")
+
+setup(ext_modules=ext_modules)
@@ -0,0 +1,141 @@
+"""
+Differential test: every execution backend must leave the VM in the same
+state, and print the same output, as driving step() one instruction at a time.
+"""
+import contextlib
+import glob
+import io
+import os
+import pathlib
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Run the run_batch() GPU kernel on Numba's CUDA simulator unless told otherwise
+os.environ.setdefault("NUMBA_ENABLE_CUDASIM", "1")
+
+import main  # noqa: E402
+
+PROGRAMS = {os.path.relpath(path, ROOT): pathlib.Path(path).read_text()
+            for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.mwasm"))
+                               + glob.glob(os.path.join(ROOT, "languages", "*", "*.mwasm")))}
+PROGRAMS.update({
+    "ADD_PROGRAM": main.ADD_PROGRAM,
+    "STACK_PROGRAM": main.STACK_PROGRAM,
+    "REVERSE_PROGRAM": main.REVERSE_PROGRAM,
+    # Fused into ADDN / ZERO by _fuse
+    "addn": "loop:\n DECJZ TIME end\n INC POWER\n GOTO loop\nend:\n PRINT\n HALT\n",
+    "zero": "SET TIME 5\nz:\n DECJZ POWER out\n GOTO z\nout:\n PRINT\n HALT\n",
+    # Jumps into the body of a fused loop, then runs off the end
+    "addn_body": "GOTO body\nloop:\n DECJZ POWER end\nbody:\n INC TIME\n GOTO loop\nend:\n PRINT\n",
+    "off_end": "INC TIME\n",
+    # Without PRINT/PUSH/POP, so run_batch() can take the GPU path
+    "addn_halt": "loop:\n DECJZ TIME end\n INC POWER\n GOTO loop\nend:\n HALT\n",
+    "zero_off_end": "z:\n DECJZ POWER out\n GOTO z\nout:\n INC TIME\n INC TIME\n",
+})
+STATES = [(0, 0), (3, 2), (7, 40)]
+LIMITS = [None, -1, 0, 1, 2, 3, 7, 50]
+# Registers at the edge of the 64-bit range
+OVERFLOW = [
+    ("INC TIME\nHALT\n", (main.INT64_MAX, 0)),
+    ("DECJZ POWER end\nend:\nHALT\n", (0, main.INT64_MIN)),
+    (PROGRAMS["addn"], (5, main.INT64_MAX - 3)),
+    (PROGRAMS["addn"], (5, main.INT64_MAX - 5)),
+]
+
+
+def _execute(load, run, source, state, max_steps, weight=100):
+    """Load, run and return (full_state, stdout, error) for one backend."""
+    vm = main.MicrowaveVM()
+    load(vm, source)
+    vm.reset_registers(TIME=state[0], POWER=state[1], WEIGHT=weight)
+    out = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(out):
+        try:
+            run(vm, max_steps)
+        except RuntimeError as e:
+            error = str(e)
+        vm.flush()
+    return vm.full_state(), out.getvalue(), error
+
+
+def _step_reference(vm, max_steps):
+    # The same loop run() used before the faster backends existed; fused
+    # loops read the limit from _step_limit
+    vm._step_limit = max_steps
+    while not vm.halted:
+        if max_steps is not None and vm.steps >= max_steps:
+            raise RuntimeError("Step limit reached (possible infinite loop).")
+        vm.step()
+
+
+def _load(vm, source):
+    vm.load_program(source)
+
+
+def _compile(vm, source):
+    vm.compile_to_python(source)
+
+
+def _run(vm, max_steps):
+    vm.run(max_steps)
+
+
+class BackendTest(unittest.TestCase):
+    def check(self, load, run, cases, python_only=False):
+        for source, state, max_steps, weight in cases:
+            with self.subTest(source=source[:40], state=state, max_steps=max_steps, weight=weight):
+                expected = _execute(_load, _step_reference, source, state, max_steps, weight)
+                if python_only:
+                    with mock.patch.object(main, "_run", None):
+                        actual = _execute(load, run, source, state, max_steps, weight)
+                else:
+                    actual = _execute(load, run, source, state, max_steps, weight)
+                self.assertEqual(actual, expected)
+
+    def cases(self):
+        for source in PROGRAMS.values():
+            for state in STATES:
+                for max_steps in LIMITS:
+                    yield source, state, max_steps, 100
+            yield source, (3, 60), None, 350
+        for source, state in OVERFLOW:
+            yield source, state, None, 100
+
+    def test_interpreted(self):
+        self.check(_load, _run, self.cases(), python_only=True)
+
+    def test_generated(self):
+        self.check(_compile, _run, self.cases(), python_only=True)
+
+    @unittest.skipIf(main._run is None, "needs Numba or the Cython build")
+    def test_native(self):
+        self.check(_load, _run, self.cases())
+
+    def test_run_batch(self):
+        for name, source in PROGRAMS.items():
+            for max_steps in LIMITS:
+                with self.subTest(program=name, max_steps=max_steps):
+                    expected = [_execute(_load, _step_reference, source, state, max_steps)
+                                for state in STATES]
+                    # run_batch() stops at the first state that fails
+                    errors = [error for _, _, error in expected if error is not None]
+                    vm = main.MicrowaveVM()
+                    vm.load_program(source)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        if errors:
+                            with self.assertRaises(RuntimeError) as raised:
+                                vm.run_batch(STATES, max_steps=max_steps)
+                            self.assertEqual(str(raised.exception), errors[0])
+                            continue
+                        results = vm.run_batch(STATES, max_steps=max_steps)
+                    self.assertEqual([tuple(int(v) for v in regs) for regs in results],
+                                     [(s["registers"]["TIME"], s["registers"]["POWER"])
+                                      for s, _, _ in expected])
+
+
+if __name__ == "__main__":
+    unittest.main()
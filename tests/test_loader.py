@@ -0,0 +1,112 @@
+"""Assembler / loader: decode cache, labels and operand validation."""
+import dataclasses
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+
+
+class DecodeCacheTest(unittest.TestCase):
+    def test_vms_share_decoded_program_safely(self):
+        first, second = main.MicrowaveVM(), main.MicrowaveVM()
+        first.load_program(main.ADD_PROGRAM)
+        second.load_program(main.ADD_PROGRAM)
+        # Same cached Instr objects...
+        self.assertTrue(all(a is b for a, b in zip(first.program, second.program)))
+        # ...which cannot be modified in place
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            first.program[0].imm = 99
+
+        # Labels are copied out of the cache
+        first.labels["loop"] = 99
+        first.labels["extra"] = 1
+        _, cached_labels = main._decode(main.ADD_PROGRAM)
+        self.assertEqual(cached_labels, second.labels)
+        self.assertNotIn("extra", cached_labels)
+
+        third = main.MicrowaveVM()
+        third.load_program(main.ADD_PROGRAM)
+        self.assertEqual(third.labels, second.labels)
+        self.assertEqual(third.program, second.program)
+
+
+class LabelTest(unittest.TestCase):
+    def assertLoadError(self, source, message):
+        with self.assertRaises(ValueError) as raised:
+            main.MicrowaveVM().load_program(source)
+        self.assertEqual(str(raised.exception), message)
+
+    def test_unknown_label_is_rejected_at_load_time(self):
+        # Even when the branch can never be taken
+        self.assertLoadError("GOTO nowhere", "Unknown label: nowhere")
+        self.assertLoadError("HALT\nGOTO nowhere\n", "Unknown label: nowhere")
+        self.assertLoadError("HALT\nDECJZ TIME nowhere\n", "Unknown label: nowhere")
+
+    def test_label_definitions(self):
+        self.assertLoadError("a:\nINC TIME\na:\nHALT\n", "Duplicate label: a")
+        self.assertLoadError(":\nHALT\n", "Empty label definition.")
+        vm = main.MicrowaveVM()
+        vm.load_program("start:\nINC TIME ; comment\n# comment\nend:\nGOTO start\nlast:\n")
+        self.assertEqual(vm.labels, {"start": 0, "end": 1, "last": 2})
+        self.assertEqual(vm.program[1].imm, 0)
+
+
+
+# (source, error message) for every check in _VALIDATORS
+LOAD_ERRORS = [
+    ("FOO TIME", "Unknown opcode: FOO"),
+    ("SET TIME", "SET expects 2 args: SET TIME"),
+    ("SET TIME 1 2", "SET expects 2 args: SET TIME 1 2"),
+    ("SET TEMP 1", "Unknown register in SET: TEMP"),
+    ("SET TIME x", "SET value must be integer: x"),
+    ("SET TIME 1.5", "SET value must be integer: 1.5"),
+    ("SET TIME 99999999999999999999", "SET value out of range: 99999999999999999999"),
+    ("SET TIME -9223372036854775809", "SET value out of range: -9223372036854775809"),
+    ("DECJZ TIME", "DECJZ expects register and label: DECJZ TIME"),
+    ("DECJZ WEIGHT end", "DECJZ expects register and label: DECJZ WEIGHT end"),
+    ("GOTO", "GOTO expects 1 label: GOTO"),
+    ("GOTO a b", "GOTO expects 1 label: GOTO a b"),
+    ("INC", "INC expects register (TIME/POWER): INC"),
+    ("INC TEMP", "INC expects register (TIME/POWER): INC TEMP"),
+    ("PUSH TIME POWER", "PUSH expects register (TIME/POWER): PUSH TIME POWER"),
+    ("POP", "POP expects register (TIME/POWER): POP"),
+    ("PRINT TIME", "PRINT takes no args: PRINT TIME"),
+    ("HALT now ; comment", "HALT takes no args: HALT now"),
+]
+# (source, decoded instruction)
+ACCEPTED = [
+    ("SET TIME +5", main.Instr(main.OP_SET, main.TIME, 5)),
+    ("SET POWER -3", main.Instr(main.OP_SET, main.POWER, -3)),
+    ("SET TIME 1_000", main.Instr(main.OP_SET, main.TIME, 1000)),
+    ("set power, 4", main.Instr(main.OP_SET, main.POWER, 4)),
+    ("SET TIME 9223372036854775807", main.Instr(main.OP_SET, main.TIME, main.INT64_MAX)),
+    ("SET TIME -9223372036854775808", main.Instr(main.OP_SET, main.TIME, main.INT64_MIN)),
+    ("inc Time", main.Instr(main.OP_INC, main.TIME)),
+    ("PUSH POWER", main.Instr(main.OP_PUSH, main.POWER)),
+    ("POP TIME  # comment", main.Instr(main.OP_POP, main.TIME)),
+    ("print", main.Instr(main.OP_PRINT)),
+]
+
+
+class ValidationTest(unittest.TestCase):
+    def test_rejected(self):
+        for source, message in LOAD_ERRORS:
+            with self.subTest(source=source):
+                with self.assertRaises(ValueError) as raised:
+                    main.MicrowaveVM().load_program(source)
+                self.assertEqual(str(raised.exception), message)
+
+    def test_accepted(self):
+        for source, instr in ACCEPTED:
+            with self.subTest(source=source):
+                vm = main.MicrowaveVM()
+                vm.load_program(source)
+                self.assertEqual(vm.program, [instr])
+
+
+if __name__ == "__main__":
+    unittest.main()
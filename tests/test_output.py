@@ -0,0 +1,80 @@
+"""PRINT output: buffered ('batch') and immediate ('stream') modes."""
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+
+# PRINTs more values than fit in one output buffer, then halts
+MANY_PRINTS = "SET POWER 1100\nl:\n DECJZ POWER end\n INC TIME\n PRINT\n GOTO l\nend:\n HALT\n"
+
+
+class _Recorder(io.StringIO):
+    """stdout stand-in that remembers every separate write()."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, s):
+        self.writes.append(s)
+        return super().write(s)
+
+
+def _capture(fn):
+    out = _Recorder()
+    with contextlib.redirect_stdout(out):
+        fn()
+    return out
+
+
+class OutputTest(unittest.TestCase):
+    def test_batch_buffer_is_written_when_full(self):
+        for load in ("load_program", "compile_to_python"):
+            with self.subTest(load=load):
+                vm = main.MicrowaveVM()
+                getattr(vm, load)(MANY_PRINTS)
+                out = _capture(vm.run)
+                # The first full buffer goes out in one write, well before HALT
+                self.assertEqual(out.writes[0],
+                                 "".join(f"TIME: {v}\n" for v in range(1, main._OUTPUT_BUFFER_SIZE + 1)))
+                self.assertEqual(out.getvalue(),
+                                 "".join(f"TIME: {v}\n" for v in range(1, 1101)) + "BEEEEEEP!\n")
+
+    def test_stream_mode_writes_every_print(self):
+        vm = main.MicrowaveVM()
+        vm.set_output_mode('stream')
+        vm.load_program("SET TIME 1\nPRINT\nINC TIME\nPRINT\nHALT\n")
+        out = _capture(vm.run)
+        self.assertEqual(out.getvalue(), "TIME: 1\nTIME: 2\nBEEEEEEP!\n")
+        # print() per PRINT, nothing held back for HALT
+        self.assertEqual(out.writes[:4], ["TIME: 1", "\n", "TIME: 2", "\n"])
+
+    def test_switching_to_stream_flushes_pending_output(self):
+        vm = main.MicrowaveVM()
+        vm._out.extend([4, 5])
+        out = _capture(lambda: vm.set_output_mode('stream'))
+        self.assertEqual(out.getvalue(), "TIME: 4\nTIME: 5\n")
+        self.assertEqual(vm._out, [])
+
+    def test_step_outside_run_prints_immediately(self):
+        vm = main.MicrowaveVM()
+        vm.load_program("SET TIME 7\nPRINT\nHALT\n")
+        out = _capture(lambda: (vm.step(), vm.step()))
+        self.assertEqual(out.getvalue(), "TIME: 7\n")
+        self.assertFalse(vm.halted)
+
+    def test_unknown_output_mode(self):
+        vm = main.MicrowaveVM()
+        with self.assertRaises(ValueError) as raised:
+            vm.set_output_mode('bogus')
+        self.assertEqual(str(raised.exception), "Unknown output mode: bogus")
+
+
+if __name__ == "__main__":
+    unittest.main()